@@ -0,0 +1,424 @@
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo se serializa dentro del proceso
+    fcntl = None
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import modelos, schemas
+from .database import SessionLocal
+
+
+
+#           --Catálogo binario de solo lectura compartido con mmap--
+
+# Ruta del archivo exportado. Si está definida, las búsquedas de libros por ID e ISBN
+# se leen del archivo (compartido entre workers por el page cache) en vez de SQLite.
+RUTA_CATALOGO = os.getenv("BIBLIOTECA_CATALOGO_MMAP")
+
+# Segundos que se agrupan las escrituras antes de volver a exportar el archivo
+RETARDO_EXPORTACION = float(os.getenv("BIBLIOTECA_CATALOGO_RETARDO", "0.5"))
+
+logger = logging.getLogger(__name__)
+
+# Archivos auxiliares junto al catálogo, compartidos por todos los workers:
+#   .lock: bloqueo que serializa las exportaciones (leer la base de datos + reemplazar el archivo)
+#   .gen:  contador de escrituras; cada exportación guarda en la cabecera el valor que incluye
+SUFIJO_BLOQUEO = ".lock"
+SUFIJO_GENERACION = ".gen"
+
+# Formato del archivo (little-endian):
+#   cabecera | registros de libros | registros de autores | IDs de autores por libro
+#   | índice hash de ISBN | heap de cadenas UTF-8
+MAGICO = b"BIBCAT02"
+CABECERA = struct.Struct("<8sQIIIIQQQQ")   # mágico, generación, n_libros, n_autores, n_pares, slots_isbn, offsets de secciones
+LIBRO = struct.Struct("<qIIIIqqII")        # id, titulo(off, len), ISBN(off, len), anio, copias, autores(off, n)
+AUTOR = struct.Struct("<qIIIIq")           # id, nombre(off, len), pais(off, len), anio
+ENTERO = struct.Struct("<q")
+SLOT = struct.Struct("<I")                 # índice del libro + 1 (0 = vacío)
+NULO = -(2 ** 63)
+
+
+def _hash_isbn(isbn: bytes) -> int:
+    # crc32 es estable entre procesos, a diferencia de hash()
+    return zlib.crc32(isbn)
+
+
+# Un lock por archivo auxiliar para serializar también los hilos del mismo proceso
+_locks_locales: Dict[str, threading.Lock] = {}
+
+
+@contextmanager
+def _bloqueo(ruta: str):
+    """
+    Bloqueo exclusivo sobre `ruta`, entre hilos y entre procesos (flock).
+    Devuelve el descriptor del archivo, abierto para lectura y escritura.
+    """
+    with _locks_locales.setdefault(ruta, threading.Lock()):
+        fd = os.open(ruta, os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield fd
+        finally:
+            # Cerrar el descriptor libera el flock
+            os.close(fd)
+
+
+def _leer_entero(fd: int) -> int:
+    os.lseek(fd, 0, os.SEEK_SET)
+    datos = os.read(fd, ENTERO.size)
+    return ENTERO.unpack(datos)[0] if len(datos) == ENTERO.size else 0
+
+
+def incrementar_generacion(ruta: str) -> int:
+    """
+    Suma una escritura al contador compartido del catálogo.
+    Debe llamarse después del commit.
+    Returns:
+        int: Generación que debe incluir el archivo para reflejar esa escritura.
+    """
+    with _bloqueo(ruta + SUFIJO_GENERACION) as fd:
+        generacion = _leer_entero(fd) + 1
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, ENTERO.pack(generacion))
+        return generacion
+
+
+def generacion_exportada(ruta: str) -> int:
+    """
+    Devuelve la generación guardada en la cabecera del archivo, o -1 si no existe o no es válido.
+    """
+    try:
+        with open(ruta, "rb") as f:
+            datos = f.read(CABECERA.size)
+    except FileNotFoundError:
+        return -1
+    if len(datos) < CABECERA.size or datos[:len(MAGICO)] != MAGICO:
+        return -1
+    return CABECERA.unpack(datos)[1]
+
+
+def exportar_compartido(ruta: str, generacion_minima: int = 0) -> Optional[int]:
+    """
+    Exporta el catálogo con el bloqueo entre procesos tomado.
+
+    Solo un worker exporta a la vez y cada uno lee la base de datos después de tomar
+    el bloqueo, así un archivo nunca reemplaza a otro con datos más nuevos. Si el
+    archivo ya incluye `generacion_minima` (otro worker exportó mientras se esperaba
+    el bloqueo) no se vuelve a exportar.
+    Args:
+        ruta (str): Ruta del archivo de catálogo.
+        generacion_minima (int): Generación que debe quedar incluida en el archivo.
+    Returns:
+        Optional[int]: Cantidad de libros exportados, o None si no hizo falta exportar.
+    """
+    with _bloqueo(ruta + SUFIJO_BLOQUEO):
+        if generacion_minima and generacion_exportada(ruta) >= generacion_minima:
+            return None
+        # El contador se lee antes que la base de datos: toda escritura contada ya hizo commit
+        with _bloqueo(ruta + SUFIJO_GENERACION) as fd:
+            generacion = _leer_entero(fd)
+        with SessionLocal() as db:
+            return exportar(db, ruta, generacion)
+
+
+def exportar(db: Session, ruta: str, generacion: int = 0) -> int:
+    """
+    Escribe el catálogo completo en `ruta` y lo reemplaza de forma atómica.
+
+    El archivo se genera en un temporal del mismo directorio y luego se renombra,
+    así los lectores ven el archivo anterior o el nuevo, nunca uno a medio escribir.
+    No toma el bloqueo entre procesos; los workers usan `exportar_compartido`.
+    Args:
+        db (Session): Sesión de la base de datos.
+        ruta (str): Ruta del archivo de catálogo.
+        generacion (int): Valor del contador de escrituras que incluye esta exportación.
+    Returns:
+        int: Cantidad de libros exportados.
+    """
+    libros = db.execute(
+        select(
+            modelos.Libro.id, modelos.Libro.titulo, modelos.Libro.ISBN,
+            modelos.Libro.anio_publicacion, modelos.Libro.copias_disponibles
+        ).order_by(modelos.Libro.id)
+    ).all()
+    autores = db.execute(
+        select(
+            modelos.Autor.id, modelos.Autor.nombre,
+            modelos.Autor.pais_origen, modelos.Autor.anio_nacimiento
+        ).order_by(modelos.Autor.id)
+    ).all()
+    pares = db.execute(
+        select(modelos.libros_autores.c.libro_id, modelos.libros_autores.c.autor_id)
+        .order_by(modelos.libros_autores.c.libro_id, modelos.libros_autores.c.autor_id)
+    ).all()
+
+    heap = bytearray()
+
+    def _cadena(texto: Optional[str]):
+        if texto is None:
+            return 0, 0xFFFFFFFF
+        datos = texto.encode("utf-8")
+        inicio = len(heap)
+        heap.extend(datos)
+        return inicio, len(datos)
+
+    autores_por_libro = {}
+    for libro_id, autor_id in pares:
+        autores_por_libro.setdefault(libro_id, []).append(autor_id)
+
+    sec_libros = bytearray()
+    sec_pares = bytearray()
+    n_pares = 0
+    isbns = []
+    for libro_id, titulo, isbn, anio, copias in libros:
+        ids = autores_por_libro.get(libro_id, [])
+        sec_libros += LIBRO.pack(
+            libro_id, *_cadena(titulo), *_cadena(isbn),
+            NULO if anio is None else anio,
+            NULO if copias is None else copias,
+            n_pares, len(ids)
+        )
+        for autor_id in ids:
+            sec_pares += ENTERO.pack(autor_id)
+        n_pares += len(ids)
+        isbns.append(isbn)
+
+    sec_autores = bytearray()
+    for autor_id, nombre, pais, anio in autores:
+        sec_autores += AUTOR.pack(
+            autor_id, *_cadena(nombre), *_cadena(pais), NULO if anio is None else anio
+        )
+
+    # Tabla hash de direccionamiento abierto con sondeo lineal, factor de carga <= 0.5
+    slots = 1
+    while slots < 2 * len(isbns):
+        slots <<= 1
+    tabla = [0] * slots
+    for indice, isbn in enumerate(isbns):
+        if isbn is None:
+            continue
+        pos = _hash_isbn(isbn.encode("utf-8")) & (slots - 1)
+        while tabla[pos]:
+            pos = (pos + 1) & (slots - 1)
+        tabla[pos] = indice + 1
+    sec_indice = struct.pack(f"<{slots}I", *tabla)
+
+    off_libros = CABECERA.size
+    off_autores = off_libros + len(sec_libros)
+    off_pares = off_autores + len(sec_autores)
+    off_indice = off_pares + len(sec_pares)
+    off_heap = off_indice + len(sec_indice)
+    cabecera = CABECERA.pack(
+        MAGICO, generacion, len(libros), len(autores), n_pares, slots,
+        off_autores, off_pares, off_indice, off_heap
+    )
+
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    fd, temporal = tempfile.mkstemp(dir=directorio, prefix=".catalogo-")
+    try:
+        # mkstemp crea el archivo con permisos 0600; los workers pueden correr con otro usuario
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "wb") as f:
+            for seccion in (cabecera, sec_libros, sec_autores, sec_pares, sec_indice, heap):
+                f.write(seccion)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+    return len(libros)
+
+
+class _Mapa:
+    """
+    Un archivo de catálogo abierto con mmap (inmutable mientras esté abierto).
+    """
+    __slots__ = ("buf", "inodo", "generacion", "n_libros", "n_autores", "slots",
+                 "off_autores", "off_pares", "off_indice", "off_heap")
+
+    def __init__(self, ruta: str):
+        with open(ruta, "rb") as f:
+            self.inodo = os.fstat(f.fileno()).st_ino
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magico, self.generacion, self.n_libros, self.n_autores, _, self.slots,
+         self.off_autores, self.off_pares, self.off_indice, self.off_heap) = CABECERA.unpack_from(self.buf, 0)
+        if magico != MAGICO:
+            raise ValueError(f"{ruta} no es un catálogo válido.")
+
+    def _cadena(self, inicio: int, largo: int) -> Optional[str]:
+        if largo == 0xFFFFFFFF:
+            return None
+        inicio += self.off_heap
+        return self.buf[inicio:inicio + largo].decode("utf-8")
+
+    def _buscar(self, offset: int, tamanio: int, cantidad: int, registro_id: int) -> int:
+        # Búsqueda binaria sobre registros ordenados por ID; devuelve el índice o -1
+        bajo, alto = 0, cantidad - 1
+        while bajo <= alto:
+            medio = (bajo + alto) // 2
+            actual = ENTERO.unpack_from(self.buf, offset + medio * tamanio)[0]
+            if actual == registro_id:
+                return medio
+            if actual < registro_id:
+                bajo = medio + 1
+            else:
+                alto = medio - 1
+        return -1
+
+    def _nombre_autor(self, autor_id: int) -> Optional[str]:
+        indice = self._buscar(self.off_autores, AUTOR.size, self.n_autores, autor_id)
+        if indice < 0:
+            return None
+        _, nombre_off, nombre_len, _, _, _ = AUTOR.unpack_from(self.buf, self.off_autores + indice * AUTOR.size)
+        return self._cadena(nombre_off, nombre_len)
+
+    def libro(self, indice: int) -> schemas.Libro:
+        (libro_id, titulo_off, titulo_len, isbn_off, isbn_len,
+         anio, copias, pares_off, n) = LIBRO.unpack_from(self.buf, CABECERA.size + indice * LIBRO.size)
+        autor_ids = struct.unpack_from(f"<{n}q", self.buf, self.off_pares + pares_off * ENTERO.size)
+        return schemas.Libro(
+            id=libro_id,
+            titulo=self._cadena(titulo_off, titulo_len),
+            ISBN=self._cadena(isbn_off, isbn_len),
+            anio_publicacion=None if anio == NULO else anio,
+            copias_disponibles=None if copias == NULO else copias,
+            autores=[nombre for nombre in map(self._nombre_autor, autor_ids) if nombre is not None]
+        )
+
+    def indice_por_id(self, libro_id: int) -> int:
+        return self._buscar(CABECERA.size, LIBRO.size, self.n_libros, libro_id)
+
+    def indice_por_isbn(self, isbn: str) -> int:
+        buscado = isbn.encode("utf-8")
+        mascara = self.slots - 1
+        pos = _hash_isbn(buscado) & mascara
+        while True:
+            valor = SLOT.unpack_from(self.buf, self.off_indice + pos * SLOT.size)[0]
+            if not valor:
+                return -1
+            _, _, _, isbn_off, isbn_len, _, _, _, _ = LIBRO.unpack_from(
+                self.buf, CABECERA.size + (valor - 1) * LIBRO.size
+            )
+            if isbn_len == len(buscado):
+                inicio = self.off_heap + isbn_off
+                if self.buf[inicio:inicio + isbn_len] == buscado:
+                    return valor - 1
+            pos = (pos + 1) & mascara
+
+
+class CatalogoMmap:
+    """
+    Lector del catálogo binario. Detecta cuando el archivo fue reemplazado
+    (nuevo inodo tras `exportar`) y vuelve a mapearlo.
+
+    Las escrituras hechas con `crud` llaman a `registrar_escritura`, que suma la escritura
+    al contador compartido y agenda una nueva exportación (agrupando las escrituras de
+    RETARDO_EXPORTACION segundos). Mientras el archivo no incluya esa generación, este
+    proceso no lo usa (`al_dia` devuelve False) y lee de la base de datos; los demás
+    workers ven los cambios en cuanto se reemplaza el archivo.
+    """
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._mapa: Optional[_Mapa] = None
+        if not os.path.exists(ruta):
+            logger.warning(
+                "El catálogo %s no existe todavía; se leerá de la base de datos hasta que se exporte.", ruta
+            )
+        self._lock_exportacion = threading.Lock()
+        self._generacion = 0   # generación de la última escritura hecha por este proceso
+        self._temporizador: Optional[threading.Timer] = None
+
+    def al_dia(self) -> bool:
+        """
+        Indica si el archivo vigente ya incluye todas las escrituras hechas por este proceso.
+        """
+        mapa = self._actual()
+        return mapa is not None and mapa.generacion >= self._generacion
+
+    def registrar_escritura(self):
+        """
+        Marca el archivo como desactualizado y agenda su reexportación.
+        Debe llamarse después del commit.
+        """
+        try:
+            generacion = incrementar_generacion(self.ruta)
+        except OSError:
+            # Sin contador no se puede saber qué archivo incluye la escritura: se deja de usar
+            logger.exception("No se pudo registrar la escritura en %s", self.ruta + SUFIJO_GENERACION)
+            generacion = sys.maxsize
+        with self._lock_exportacion:
+            self._generacion = max(self._generacion, generacion)
+            if self._temporizador is None:
+                self._temporizador = threading.Timer(RETARDO_EXPORTACION, self._reexportar)
+                self._temporizador.daemon = True
+                self._temporizador.start()
+
+    def _reexportar(self):
+        with self._lock_exportacion:
+            self._temporizador = None
+            generacion = self._generacion
+        try:
+            exportar_compartido(self.ruta, generacion)
+        except Exception:
+            logger.exception("No se pudo reexportar el catálogo %s", self.ruta)
+
+    def _actual(self) -> Optional[_Mapa]:
+        """
+        Devuelve el mapa vigente; lo abre si el archivo apareció o fue reemplazado.
+        Si el archivo todavía no existe devuelve None (y se lee de la base de datos).
+        """
+        try:
+            inodo = os.stat(self.ruta).st_ino
+        except FileNotFoundError:
+            return self._mapa
+        mapa = self._mapa
+        if mapa is None or inodo != mapa.inodo:
+            with self._lock:
+                if self._mapa is None or inodo != self._mapa.inodo:
+                    # El mapa anterior se libera cuando ningún lector lo esté usando
+                    self._mapa = _Mapa(self.ruta)
+                mapa = self._mapa
+        return mapa
+
+    def obtener_libro(self, libro_id: int) -> Optional[schemas.Libro]:
+        mapa = self._actual()
+        if mapa is None:
+            return None
+        indice = mapa.indice_por_id(libro_id)
+        return mapa.libro(indice) if indice >= 0 else None
+
+    def obtener_libro_por_isbn(self, isbn: str) -> Optional[schemas.Libro]:
+        mapa = self._actual()
+        if mapa is None:
+            return None
+        indice = mapa.indice_por_isbn(isbn)
+        return mapa.libro(indice) if indice >= 0 else None
+
+
+# Instancia global; solo existe si se configuró BIBLIOTECA_CATALOGO_MMAP.
+# El archivo se abre en la primera lectura en que exista.
+catalogo: Optional[CatalogoMmap] = CatalogoMmap(RUTA_CATALOGO) if RUTA_CATALOGO else None
+
+
+if __name__ == "__main__":
+    # Uso: python -m app.catalogo_mmap [ruta]
+    destino = sys.argv[1] if len(sys.argv) > 1 else (RUTA_CATALOGO or "catalogo.bin")
+    total = exportar_compartido(destino)
+    print(f"Catálogo exportado en {destino} ({total} libros)")
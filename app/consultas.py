@@ -0,0 +1,118 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from . import modelos
+
+
+
+#           --Consultas de lectura con SQLAlchemy Core (ruta rápida)--
+
+# Las consultas se escriben con lambda_stmt: SQLAlchemy genera la clave de caché a
+# partir del código de la lambda y reutiliza la sentencia compilada del
+# compiled_cache del engine, así que cada llamada solo cambia los parámetros.
+# Devuelven filas (Row) en vez de objetos ORM: no pasan por el identity map.
+# Los listados se ordenan por ID para que skip/limit sean estables también en bases
+# cliente-servidor (PostgreSQL no garantiza el orden sin ORDER BY) y para que coincidan
+# con el snapshot y el catálogo mmap, que devuelven autores y libros relacionados por ID.
+
+_libros = modelos.Libro.__table__
+_autores = modelos.Autor.__table__
+_libros_autores = modelos.libros_autores
+
+
+def _ejecutar(db: Session, stmt) -> List[Row]:
+    # Se usa la conexión de la sesión (misma transacción) sin la capa ORM
+    return db.connection().execute(stmt).all()
+
+
+def libro_por_id(db: Session, libro_id: int) -> Optional[Row]:
+    filas = _ejecutar(db, lambda_stmt(lambda: select(_libros).where(_libros.c.id == libro_id)))
+    return filas[0] if filas else None
+
+
+def libro_por_isbn(db: Session, isbn: str) -> Optional[Row]:
+    filas = _ejecutar(db, lambda_stmt(lambda: select(_libros).where(_libros.c.ISBN == isbn)))
+    return filas[0] if filas else None
+
+
+def libros(db: Session, skip: int = 0, limit: int = 100) -> List[Row]:
+    return _ejecutar(db, lambda_stmt(lambda: select(_libros).order_by(_libros.c.id).offset(skip).limit(limit)))
+
+
+def libros_por_anio(db: Session, anio_publicacion: int, skip: int = 0, limit: int = 100) -> List[Row]:
+    stmt = lambda_stmt(lambda: select(_libros).where(_libros.c.anio_publicacion == anio_publicacion))
+    stmt += lambda s: s.order_by(_libros.c.id).offset(skip).limit(limit)
+    return _ejecutar(db, stmt)
+
+
+def libros_de_autor(db: Session, autor_id: int) -> List[Row]:
+    return _ejecutar(db, lambda_stmt(
+        lambda: select(_libros)
+        .join(_libros_autores, _libros_autores.c.libro_id == _libros.c.id)
+        .where(_libros_autores.c.autor_id == autor_id)
+        .order_by(_libros.c.id)
+    ))
+
+
+def autor_por_id(db: Session, autor_id: int) -> Optional[Row]:
+    filas = _ejecutar(db, lambda_stmt(lambda: select(_autores).where(_autores.c.id == autor_id)))
+    return filas[0] if filas else None
+
+
+def autores(db: Session, pais: Optional[str] = None, skip: int = 0, limit: int = 100) -> List[Row]:
+    stmt = lambda_stmt(lambda: select(_autores))
+    if pais:
+        stmt += lambda s: s.where(_autores.c.pais_origen == pais)
+    stmt += lambda s: s.order_by(_autores.c.id).offset(skip).limit(limit)
+    return _ejecutar(db, stmt)
+
+
+def autores_de_libro(db: Session, libro_id: int) -> List[Row]:
+    return _ejecutar(db, lambda_stmt(
+        lambda: select(_autores)
+        .join(_libros_autores, _libros_autores.c.autor_id == _autores.c.id)
+        .where(_libros_autores.c.libro_id == libro_id)
+        .order_by(_autores.c.id)
+    ))
+
+
+def nombres_de_autores(db: Session, libro_ids: Iterable[int]) -> Dict[int, List[str]]:
+    """
+    Devuelve los nombres de los autores de cada libro en una sola consulta.
+    """
+    ids = list(libro_ids)
+    resultado: Dict[int, List[str]] = defaultdict(list)
+    if not ids:
+        return resultado
+    filas = _ejecutar(db, lambda_stmt(
+        lambda: select(_libros_autores.c.libro_id, _autores.c.nombre)
+        .join(_autores, _autores.c.id == _libros_autores.c.autor_id)
+        .where(_libros_autores.c.libro_id.in_(ids))
+        .order_by(_libros_autores.c.libro_id, _libros_autores.c.autor_id)
+    ))
+    for libro_id, nombre in filas:
+        resultado[libro_id].append(nombre)
+    return resultado
+
+
+def titulos_de_libros(db: Session, autor_ids: Iterable[int]) -> Dict[int, List[str]]:
+    """
+    Devuelve los títulos de los libros de cada autor en una sola consulta.
+    """
+    ids = list(autor_ids)
+    resultado: Dict[int, List[str]] = defaultdict(list)
+    if not ids:
+        return resultado
+    filas = _ejecutar(db, lambda_stmt(
+        lambda: select(_libros_autores.c.autor_id, _libros.c.titulo)
+        .join(_libros, _libros.c.id == _libros_autores.c.libro_id)
+        .where(_libros_autores.c.autor_id.in_(ids))
+        .order_by(_libros_autores.c.autor_id, _libros_autores.c.libro_id)
+    ))
+    for autor_id, titulo in filas:
+        resultado[autor_id].append(titulo)
+    return resultado
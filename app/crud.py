@@ -1,7 +1,7 @@
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from . import modelos, schemas
+from . import modelos, schemas, snapshot, catalogo_mmap, consultas
 
 
 
@@ -43,6 +43,68 @@ def _libro_to_schema(l: modelos.Libro) -> schemas.Libro:
     )
 
 
+def _filas_a_libros(db: Session, filas) -> List[schemas.Libro]:
+    """
+    Convierte filas de `consultas` (tabla libros) a esquemas, trayendo los autores en una sola consulta.
+    Args:
+        db (Session): Sesión de la base de datos.
+        filas: Filas de la tabla libros.
+    Returns:
+        List[schemas.Libro]: Libros listos para ser devueltos al cliente.
+    """
+    nombres = consultas.nombres_de_autores(db, [f.id for f in filas])
+    return [
+        schemas.Libro(
+            id=f.id,
+            titulo=f.titulo,
+            ISBN=f.ISBN,
+            anio_publicacion=f.anio_publicacion,
+            copias_disponibles=f.copias_disponibles,
+            autores=nombres.get(f.id, [])
+        )
+        for f in filas
+    ]
+
+
+def _filas_a_autores(db: Session, filas) -> List[schemas.Autor]:
+    """
+    Convierte filas de `consultas` (tabla autores) a esquemas, trayendo los títulos en una sola consulta.
+    Args:
+        db (Session): Sesión de la base de datos.
+        filas: Filas de la tabla autores.
+    Returns:
+        List[schemas.Autor]: Autores listos para ser devueltos al cliente.
+    """
+    titulos = consultas.titulos_de_libros(db, [f.id for f in filas])
+    return [
+        schemas.Autor(
+            id=f.id,
+            nombre=f.nombre,
+            pais_origen=f.pais_origen,
+            anio_nacimiento=f.anio_nacimiento,
+            libros=titulos.get(f.id, [])
+        )
+        for f in filas
+    ]
+
+
+
+def _mensaje_integridad(e: IntegrityError) -> Optional[str]:
+    """
+    Traduce un IntegrityError (SQLite o PostgreSQL) al mensaje que se devuelve al cliente.
+    Args:
+        e (IntegrityError): Error lanzado por la base de datos.
+    Returns:
+        Optional[str]: Mensaje para el cliente, o None si no es un caso conocido.
+    """
+    detalle = str(e.orig).lower()
+    if "unique" in detalle and "isbn" in detalle:
+        return "El ISBN ya está registrado en otro libro."
+    if "not null" in detalle or "not-null" in detalle:
+        return "Faltan datos obligatorios del libro."
+    return None
+
+
 
 #           --CRUD PARA AUTORES--
 
@@ -60,6 +122,8 @@ def crear_autor(db: Session, autor: schemas.AutorCreate) -> schemas.Autor:
     db.add(db_autor)
     db.commit()
     db.refresh(db_autor)
+    if snapshot.catalogo:
+        snapshot.catalogo.refrescar_autor(db, db_autor.id)
     return _autor_to_schema(db_autor)
 
 
@@ -72,8 +136,10 @@ def obtener_autor(db: Session, autor_id: int) -> Optional[schemas.Autor]:
     Returns:
         Optional[schemas.Autor]: Autor encontrado o None si no existe.
     """
-    autor = db.query(modelos.Autor).filter(modelos.Autor.id == autor_id).first()
-    return _autor_to_schema(autor) if autor else None
+    if snapshot.catalogo:
+        return snapshot.catalogo.obtener_autor(autor_id)
+    autor = consultas.autor_por_id(db, autor_id)
+    return _filas_a_autores(db, [autor])[0] if autor else None
 
 
 def obtener_autores(
@@ -92,11 +158,7 @@ def obtener_autores(
     Returns:
         List[schemas.Autor]: Lista de autores encontrados.
     """
-    query = db.query(modelos.Autor)
-    if pais:
-        query = query.filter(modelos.Autor.pais_origen == pais)
-    autores = query.offset(skip).limit(limit).all()
-    return [_autor_to_schema(a) for a in autores]
+    return _filas_a_autores(db, consultas.autores(db, pais, skip, limit))
 
 
 def actualizar_autor(db: Session, autor_id: int, autor: schemas.AutorCreate) -> Optional[schemas.Autor]:
@@ -116,6 +178,10 @@ def actualizar_autor(db: Session, autor_id: int, autor: schemas.AutorCreate) ->
         db_autor.anio_nacimiento = autor.anio_nacimiento
         db.commit()
         db.refresh(db_autor)
+        if snapshot.catalogo:
+            snapshot.catalogo.refrescar_autor(db, autor_id)
+        if catalogo_mmap.catalogo:
+            catalogo_mmap.catalogo.registrar_escritura()
         return _autor_to_schema(db_autor)
     return None
 
@@ -134,6 +200,10 @@ def eliminar_autor(db: Session, autor_id: int) -> Optional[schemas.Autor]:
         resultado = _autor_to_schema(db_autor)
         db.delete(db_autor)
         db.commit()
+        if snapshot.catalogo:
+            snapshot.catalogo.refrescar_autor(db, autor_id)
+        if catalogo_mmap.catalogo:
+            catalogo_mmap.catalogo.registrar_escritura()
         return resultado
     return None
 
@@ -151,7 +221,7 @@ def crear_libro(db: Session, libro: schemas.LibroCreate, autor_ids: List[int]) -
         autor_ids (List[int]): Lista de IDs de autores asociados.
     Raises:
         ValueError: Si no se encuentran autores con los IDs proporcionados.
-        ValueError: Si el ISBN ya está registrado.
+        ValueError: Si el ISBN ya está registrado o faltan datos obligatorios.
     Returns:
         schemas.Libro: Libro creado con los autores asociados.
     """
@@ -168,10 +238,17 @@ def crear_libro(db: Session, libro: schemas.LibroCreate, autor_ids: List[int]) -
         db.add(db_libro)
         db.commit()
         db.refresh(db_libro)
-    except IntegrityError:
+    except IntegrityError as e:
         db.rollback()
-        raise ValueError("El ISBN ya está registrado en otro libro.")
-
+        mensaje = _mensaje_integridad(e)
+        if mensaje is None:
+            raise
+        raise ValueError(mensaje)
+
+    if snapshot.catalogo:
+        snapshot.catalogo.refrescar_libro(db, db_libro.id)
+    if catalogo_mmap.catalogo:
+        catalogo_mmap.catalogo.registrar_escritura()
     return _libro_to_schema(db_libro)
 
 
@@ -185,8 +262,7 @@ def obtener_libros(db: Session, skip: int = 0, limit: int = 100) -> List[schemas
     Returns:
         List[schemas.Libro]: Lista de libros encontrados.
     """
-    libros = db.query(modelos.Libro).offset(skip).limit(limit).all()
-    return [_libro_to_schema(l) for l in libros]
+    return _filas_a_libros(db, consultas.libros(db, skip, limit))
 
 
 def obtener_libros_por_anio(
@@ -205,14 +281,9 @@ def obtener_libros_por_anio(
     Returns:
         List[schemas.Libro]: Lista de libros del año indicado.
     """
-    libros = (
-        db.query(modelos.Libro)
-        .filter(modelos.Libro.anio_publicacion == anio_publicacion)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
-    return [_libro_to_schema(l) for l in libros]
+    if snapshot.catalogo:
+        return snapshot.catalogo.obtener_libros_por_anio(anio_publicacion, skip, limit)
+    return _filas_a_libros(db, consultas.libros_por_anio(db, anio_publicacion, skip, limit))
 
 
 def obtener_libro(db: Session, libro_id: int) -> Optional[schemas.Libro]:
@@ -224,8 +295,31 @@ def obtener_libro(db: Session, libro_id: int) -> Optional[schemas.Libro]:
     Returns:
         Optional[schemas.Libro]: Libro encontrado o None si no existe.
     """
-    libro = db.query(modelos.Libro).filter(modelos.Libro.id == libro_id).first()
-    return _libro_to_schema(libro) if libro else None
+    if snapshot.catalogo:
+        return snapshot.catalogo.obtener_libro(libro_id)
+    if catalogo_mmap.catalogo and catalogo_mmap.catalogo.al_dia():
+        libro = catalogo_mmap.catalogo.obtener_libro(libro_id)
+        if libro:
+            return libro
+    libro = consultas.libro_por_id(db, libro_id)
+    return _filas_a_libros(db, [libro])[0] if libro else None
+
+
+def obtener_libro_por_isbn(db: Session, isbn: str) -> Optional[schemas.Libro]:
+    """
+    Obtiene un libro por su ISBN.
+    Args:
+        db (Session): Sesión de la base de datos.
+        isbn (str): ISBN del libro a buscar.
+    Returns:
+        Optional[schemas.Libro]: Libro encontrado o None si no existe.
+    """
+    if catalogo_mmap.catalogo and catalogo_mmap.catalogo.al_dia():
+        libro = catalogo_mmap.catalogo.obtener_libro_por_isbn(isbn)
+        if libro:
+            return libro
+    libro = consultas.libro_por_isbn(db, isbn)
+    return _filas_a_libros(db, [libro])[0] if libro else None
 
 
 def actualizar_libro(db: Session, libro_id: int, libro_data) -> Optional[schemas.Libro]:
@@ -233,6 +327,7 @@ def actualizar_libro(db: Session, libro_id: int, libro_data) -> Optional[schemas
     Actualiza un libro por su ID.
     - No permite que las copias sean negativas.
     - Permite cambiar los autores si se envían nuevos IDs.
+    - No permite usar un ISBN que ya tenga otro libro.
     """
     # Buscar el libro
     db_libro = db.query(modelos.Libro).filter(modelos.Libro.id == libro_id).first()
@@ -258,8 +353,19 @@ def actualizar_libro(db: Session, libro_id: int, libro_data) -> Optional[schemas
         db_libro.autores = autores
 
     # Guardar los cambios
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        mensaje = _mensaje_integridad(e)
+        if mensaje is None:
+            raise
+        raise ValueError(mensaje)
     db.refresh(db_libro)
+    if snapshot.catalogo:
+        snapshot.catalogo.refrescar_libro(db, db_libro.id)
+    if catalogo_mmap.catalogo:
+        catalogo_mmap.catalogo.registrar_escritura()
 
     return _libro_to_schema(db_libro)
 
@@ -292,6 +398,10 @@ def eliminar_libro(db: Session, libro_id: int) -> Optional[schemas.Libro]:
         resultado = _libro_to_schema(db_libro)
         db.delete(db_libro)
         db.commit()
+        if snapshot.catalogo:
+            snapshot.catalogo.refrescar_libro(db, libro_id)
+        if catalogo_mmap.catalogo:
+            catalogo_mmap.catalogo.registrar_escritura()
         return resultado
     return None
 
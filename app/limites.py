@@ -0,0 +1,172 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict
+
+from fastapi import HTTPException, Request
+
+
+
+#           --Control de admisión: límite de tasa y concurrencia--
+
+# Tamaño máximo de página que acepta el servidor en los listados (?limit=)
+LIMITE_MAXIMO = int(os.getenv("BIBLIOTECA_LIMITE_MAXIMO", "100"))
+
+# Tamaño de página cuando no se envía ?limit=; nunca mayor que el máximo
+LIMITE_POR_DEFECTO = min(100, LIMITE_MAXIMO)
+
+# Token bucket por cliente: peticiones por segundo y ráfaga permitida
+TASA_POR_SEGUNDO = float(os.getenv("BIBLIOTECA_TASA_POR_SEGUNDO", "10"))
+RAFAGA_MAXIMA = float(os.getenv("BIBLIOTECA_RAFAGA_MAXIMA", "20"))
+
+# Peticiones simultáneas permitidas por ruta
+CONCURRENCIA_POR_RUTA = int(os.getenv("BIBLIOTECA_CONCURRENCIA_POR_RUTA", "8"))
+
+# Número máximo de clientes recordados (los más antiguos se descartan)
+MAX_CLIENTES = 10_000
+
+# API keys reconocidas (separadas por comas). Solo estas tienen cubeta propia;
+# cualquier otra cabecera X-API-Key se ignora y el cliente se identifica por su IP.
+API_KEYS = frozenset(
+    k.strip() for k in os.getenv("BIBLIOTECA_API_KEYS", "").split(",") if k.strip()
+)
+
+
+class TokenBucket:
+    """
+    Cubeta de fichas clásica: se recarga a `tasa` fichas por segundo
+    hasta `capacidad` y cada petición consume una ficha.
+    """
+    __slots__ = ("tasa", "capacidad", "fichas", "ultimo")
+
+    def __init__(self, tasa: float, capacidad: float):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self.fichas = capacidad
+        self.ultimo = time.monotonic()
+
+    def consumir(self) -> float:
+        """
+        Intenta consumir una ficha.
+        Returns:
+            float: 0 si se admitió la petición; si no, los segundos a esperar.
+        """
+        ahora = time.monotonic()
+        self.fichas = min(self.capacidad, self.fichas + (ahora - self.ultimo) * self.tasa)
+        self.ultimo = ahora
+        if self.fichas >= 1:
+            self.fichas -= 1
+            return 0.0
+        return (1 - self.fichas) / self.tasa
+
+
+_lock = threading.Lock()
+_cubetas: "OrderedDict[str, TokenBucket]" = OrderedDict()
+_semaforos: Dict[str, threading.BoundedSemaphore] = {}
+_en_curso: Dict[str, int] = {}
+
+contadores: Dict[str, int] = {
+    "admitidas": 0,
+    "rechazadas_tasa": 0,
+    "rechazadas_concurrencia": 0,
+}
+
+
+def _clave_cliente(request: Request) -> str:
+    """
+    Identifica al cliente por su API key (cabecera X-API-Key) si es una de API_KEYS;
+    si no, por su IP. Así enviar una key inventada en cada petición no da una cubeta nueva.
+    """
+    api_key = request.headers.get("x-api-key")
+    if api_key in API_KEYS:
+        return f"key:{api_key}"
+    return f"ip:{request.client.host if request.client else 'desconocido'}"
+
+
+def _clave_ruta(request: Request) -> str:
+    """
+    Devuelve la plantilla de la ruta (ej. "GET /libros/{libro_id}") para agrupar la concurrencia.
+    """
+    ruta = request.scope.get("route")
+    return f"{request.method} {getattr(ruta, 'path', request.url.path)}"
+
+
+async def limitar_tasa(request: Request):
+    """
+    Dependencia de FastAPI que aplica el token bucket del cliente.
+    Es async para correr en el event loop: el rechazo no espera un hilo libre del pool
+    que atiende los endpoints síncronos (las secciones críticas son cortas y no bloquean).
+
+    Raises:
+        HTTPException: 429 con cabecera Retry-After si el cliente agotó sus fichas.
+    """
+    clave = _clave_cliente(request)
+    with _lock:
+        cubeta = _cubetas.get(clave)
+        if cubeta is None:
+            cubeta = TokenBucket(TASA_POR_SEGUNDO, RAFAGA_MAXIMA)
+            _cubetas[clave] = cubeta
+            if len(_cubetas) > MAX_CLIENTES:
+                _cubetas.popitem(last=False)
+        else:
+            _cubetas.move_to_end(clave)
+        espera = cubeta.consumir()
+        if espera:
+            contadores["rechazadas_tasa"] += 1
+
+    if espera:
+        raise HTTPException(
+            status_code=429,
+            detail="Demasiadas peticiones, intenta más tarde.",
+            headers={"Retry-After": str(math.ceil(espera))}
+        )
+
+
+async def limitar_concurrencia(request: Request):
+    """
+    Dependencia de FastAPI que limita las peticiones simultáneas por ruta.
+    Si la ruta ya está llena, descarta la petición en lugar de encolarla.
+    Igual que `limitar_tasa`, se evalúa en el event loop y no ocupa un hilo del pool.
+
+    Raises:
+        HTTPException: 503 con cabecera Retry-After si se alcanzó el límite de la ruta.
+    """
+    clave = _clave_ruta(request)
+    with _lock:
+        semaforo = _semaforos.get(clave)
+        if semaforo is None:
+            semaforo = _semaforos[clave] = threading.BoundedSemaphore(CONCURRENCIA_POR_RUTA)
+
+    if not semaforo.acquire(blocking=False):
+        with _lock:
+            contadores["rechazadas_concurrencia"] += 1
+        raise HTTPException(
+            status_code=503,
+            detail="Servidor ocupado, intenta más tarde.",
+            headers={"Retry-After": "1"}
+        )
+
+    with _lock:
+        contadores["admitidas"] += 1
+        _en_curso[clave] = _en_curso.get(clave, 0) + 1
+    try:
+        yield
+    finally:
+        with _lock:
+            _en_curso[clave] -= 1
+        semaforo.release()
+
+
+def obtener_metricas() -> dict:
+    """
+    Devuelve una copia de los contadores de admisión y las peticiones en curso por ruta.
+    """
+    with _lock:
+        return {
+            **contadores,
+            "clientes": len(_cubetas),
+            "en_curso": dict(_en_curso),
+            "limite_maximo": LIMITE_MAXIMO,
+        }
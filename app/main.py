@@ -1,12 +1,18 @@
 from fastapi import FastAPI
-from .database import Base, engine
+from .database import Base, engine, SessionLocal
 from .routers import libros, autores
+from . import limites, snapshot
 
 #          --Configuración principal de la aplicación--
 
 # Crea las tablas en la base de datos
 Base.metadata.create_all(bind=engine)
 
+# Carga el snapshot en memoria si el modo está activo (BIBLIOTECA_SNAPSHOT=1)
+if snapshot.catalogo:
+    with SessionLocal() as db:
+        snapshot.catalogo.cargar(db)
+
 # Inicializa la aplicación FastAPI
 app = FastAPI(
     title="API Biblioteca",
@@ -22,6 +28,24 @@ def root():
     return {"message": "Bienvenido a la API de Biblioteca"}
 
 
+@app.get("/metricas/limites")
+def metricas_limites():
+    """
+    Muestra los contadores de peticiones admitidas y rechazadas por límite de tasa o de concurrencia.
+    """
+    return limites.obtener_metricas()
+
+
+@app.get("/metricas/snapshot")
+def metricas_snapshot():
+    """
+    Muestra la memoria que ocupa el snapshot en memoria y su estimación por millón de libros.
+    """
+    if not snapshot.catalogo:
+        return {"activo": False}
+    return {"activo": True, **snapshot.catalogo.reporte_memoria()}
+
+
 # Incluye los routers de autores y libros
 app.include_router(autores.router)
 app.include_router(libros.router)
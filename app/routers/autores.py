@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List
-from .. import crud, schemas, database, modelos
+from .. import crud, schemas, database, limites, snapshot, consultas
 
 
 #       --Rutas para gestionar autores--
 
-router = APIRouter(prefix="/autores", tags=["Autores"])
+router = APIRouter(
+    prefix="/autores",
+    tags=["Autores"],
+    dependencies=[Depends(limites.limitar_tasa), Depends(limites.limitar_concurrencia)]
+)
 
 #Crear un autor
 
@@ -21,7 +25,10 @@ def crear_autor(autor: schemas.AutorCreate, db: Session = Depends(database.get_d
 
 @router.get("/", response_model=List[schemas.Autor])
 def obtener_autores(
-    pais: str | None = None, skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db)
+    pais: str | None = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(limites.LIMITE_POR_DEFECTO, ge=1, le=limites.LIMITE_MAXIMO),
+    db: Session = Depends(database.get_db)
 ):
     """
     Obtiene una lista de autores. Se puede filtrar por país.
@@ -64,14 +71,10 @@ def obtener_libros_por_autor(autor_id: int, db: Session = Depends(database.get_d
     if not autor:
         raise HTTPException(status_code=404, detail="Autor no encontrado")
 
-    libros = (
-        db.query(modelos.Libro)
-        .join(modelos.libros_autores)
-        .filter(modelos.libros_autores.c.autor_id == autor_id)
-        .all()
-    )
+    if snapshot.catalogo:
+        return snapshot.catalogo.obtener_libros_de_autor(autor_id)
 
-    return [crud._libro_to_schema(l) for l in libros]
+    return crud._filas_a_libros(db, consultas.libros_de_autor(db, autor_id))
 
 
 #Eliminar autor
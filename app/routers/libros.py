@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from .. import crud, schemas, database, modelos
+from .. import crud, schemas, database, limites, snapshot, consultas
 from pydantic import BaseModel, Field
 
 
 #       --RUTAS PARA GESTIONAR LIBROS--
 
 
-router = APIRouter(prefix="/libros", tags=["Libros"])
+router = APIRouter(
+    prefix="/libros",
+    tags=["Libros"],
+    dependencies=[Depends(limites.limitar_tasa), Depends(limites.limitar_concurrencia)]
+)
 
 
 
@@ -60,8 +64,8 @@ def crear_libro(data: LibroConAutores, db: Session = Depends(database.get_db)):
 @router.get("/", response_model=List[schemas.Libro])
 def obtener_libros(
         anio_publicacion: Optional[int] = None,
-        skip: int = 0,
-        limit: int = 100,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(limites.LIMITE_POR_DEFECTO, ge=1, le=limites.LIMITE_MAXIMO),
         db: Session = Depends(database.get_db)
 ):
     """
@@ -74,6 +78,19 @@ def obtener_libros(
     return crud.obtener_libros(db, skip, limit)
 
 
+# OBTENER LIBRO POR ISBN
+
+@router.get("/isbn/{isbn}", response_model=schemas.Libro)
+def obtener_libro_por_isbn(isbn: str, db: Session = Depends(database.get_db)):
+    """
+    Busca y devuelve un libro específico por su ISBN.
+    """
+    libro = crud.obtener_libro_por_isbn(db, isbn)
+    if not libro:
+        raise HTTPException(status_code=404, detail="Libro no encontrado")
+    return libro
+
+
 # OBTENER LIBRO POR ID
 
 @router.get("/{libro_id}", response_model=schemas.Libro)
@@ -117,11 +134,16 @@ def obtener_autores_por_libro(libro_id: int, db: Session = Depends(database.get_
     """
     Muestra los autores asociados a un libro específico.
     """
-    libro = db.query(modelos.Libro).filter(modelos.Libro.id == libro_id).first()
-    if not libro:
+    if snapshot.catalogo:
+        autores = snapshot.catalogo.obtener_autores_de_libro(libro_id)
+        if autores is None:
+            raise HTTPException(status_code=404, detail="Libro no encontrado")
+        return autores
+
+    if not consultas.libro_por_id(db, libro_id):
         raise HTTPException(status_code=404, detail="Libro no encontrado")
 
-    return [crud._autor_to_schema(a) for a in libro.autores]
+    return crud._filas_a_autores(db, consultas.autores_de_libro(db, libro_id))
 
 
 # ELIMINAR LIBRO
@@ -0,0 +1,464 @@
+import os
+import sys
+import threading
+from array import array
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import modelos, schemas
+
+
+
+#           --Snapshot compacto del catálogo en memoria (opcional)--
+
+# Se activa con BIBLIOTECA_SNAPSHOT=1. Pensado para cargas de mucha lectura con un
+# solo worker: las escrituras que pasan por `crud` actualizan el snapshot del
+# proceso que las hizo, no el de otros workers.
+ACTIVO = os.getenv("BIBLIOTECA_SNAPSHOT", "0") == "1"
+
+# Valor usado en los arreglos de enteros para representar NULL
+NULO = -(2 ** 63)
+
+# Cantidad de listas modificadas antes de recompactar la adyacencia CSR
+UMBRAL_COMPACTAR = 1024
+
+
+def _a_entero(valor: Optional[int]) -> int:
+    return NULO if valor is None else valor
+
+
+def _de_entero(valor: int) -> Optional[int]:
+    return None if valor == NULO else valor
+
+
+def _bytes_cadenas(*textos: Optional[str]) -> int:
+    return sum(sys.getsizeof(t) for t in textos if t is not None)
+
+
+class _Adyacencia:
+    """
+    Listas de adyacencia en formato CSR (offsets + índices) indexadas por ID.
+
+    Las modificaciones se guardan en `parches` y se vuelcan al CSR cuando
+    superan UMBRAL_COMPACTAR, así una escritura no obliga a reconstruir todo.
+    `n_pares` lleva la cuenta de vecinos vigentes sin recorrer las listas.
+    """
+    __slots__ = ("offsets", "indices", "parches", "n_pares")
+
+    def __init__(self):
+        self.offsets = array("q", [0])
+        self.indices = array("q")
+        self.parches: Dict[int, array] = {}
+        self.n_pares = 0
+
+    @classmethod
+    def desde_pares(cls, pares: Iterable[Tuple[int, int]], tamanio: int) -> "_Adyacencia":
+        """
+        Construye el CSR a partir de pares (origen, destino) con un conteo por origen.
+        """
+        pares = sorted(pares)
+        tamanio = max(tamanio, pares[-1][0] + 1 if pares else 0)
+        adyacencia = cls()
+        conteos = [0] * (tamanio + 1)
+        for origen, _ in pares:
+            conteos[origen + 1] += 1
+        for i in range(tamanio):
+            conteos[i + 1] += conteos[i]
+        adyacencia.offsets = array("q", conteos)
+        adyacencia.indices = array("q", (destino for _, destino in pares))
+        adyacencia.n_pares = len(adyacencia.indices)
+        return adyacencia
+
+    def vecinos(self, nodo: int) -> array:
+        parche = self.parches.get(nodo)
+        if parche is not None:
+            return parche
+        if nodo + 1 >= len(self.offsets):
+            return array("q")
+        return self.indices[self.offsets[nodo]:self.offsets[nodo + 1]]
+
+    def reemplazar(self, nodo: int, vecinos: Iterable[int]):
+        nuevos = array("q", sorted(vecinos))
+        self.n_pares += len(nuevos) - len(self.vecinos(nodo))
+        self.parches[nodo] = nuevos
+        if len(self.parches) > UMBRAL_COMPACTAR:
+            self.compactar()
+
+    def agregar(self, nodo: int, vecino: int):
+        actuales = self.vecinos(nodo)
+        if vecino not in actuales:
+            self.reemplazar(nodo, [*actuales, vecino])
+
+    def quitar(self, nodo: int, vecino: int):
+        actuales = self.vecinos(nodo)
+        if vecino in actuales:
+            self.reemplazar(nodo, [v for v in actuales if v != vecino])
+
+    def compactar(self):
+        tamanio = max(len(self.offsets) - 1, max(self.parches, default=-1) + 1)
+        offsets = array("q", [0])
+        indices = array("q")
+        for nodo in range(tamanio):
+            indices.extend(self.vecinos(nodo))
+            offsets.append(len(indices))
+        self.offsets, self.indices, self.parches = offsets, indices, {}
+
+    def bytes(self) -> int:
+        return (
+            sys.getsizeof(self.offsets)
+            + sys.getsizeof(self.indices)
+            + sum(sys.getsizeof(p) for p in self.parches.values())
+        )
+
+
+class Catalogo:
+    """
+    Copia en memoria de `libros`, `autores` y `libros_autores` en arreglos indexados por ID.
+    """
+    __slots__ = (
+        "_lock", "_lock_escritura",
+        "libro_existe", "libro_titulo", "libro_isbn", "libro_anio", "libro_copias",
+        "autor_existe", "autor_nombre", "autor_pais", "autor_anio",
+        "autores_de_libro", "libros_de_autor", "libros_por_anio",
+        "n_libros", "n_autores", "bytes_cadenas_libros", "bytes_cadenas_autores",
+    )
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._lock_escritura = threading.Lock()
+        self._vaciar()
+
+    def _vaciar(self):
+        self.libro_existe = bytearray()
+        self.libro_titulo: List[Optional[str]] = []
+        self.libro_isbn: List[Optional[str]] = []
+        self.libro_anio = array("q")
+        self.libro_copias = array("q")
+        self.autor_existe = bytearray()
+        self.autor_nombre: List[Optional[str]] = []
+        self.autor_pais: List[Optional[str]] = []
+        self.autor_anio = array("q")
+        self.autores_de_libro = _Adyacencia()
+        self.libros_de_autor = _Adyacencia()
+        self.libros_por_anio: Dict[Optional[int], List[int]] = {}
+        # Contadores para `reporte_memoria` (se actualizan en cada escritura)
+        self.n_libros = 0
+        self.n_autores = 0
+        self.bytes_cadenas_libros = 0
+        self.bytes_cadenas_autores = 0
+
+    # -- Crecimiento de los arreglos --
+
+    def _asegurar_libro(self, libro_id: int):
+        faltan = libro_id + 1 - len(self.libro_existe)
+        if faltan > 0:
+            self.libro_existe.extend(bytes(faltan))
+            self.libro_titulo.extend([None] * faltan)
+            self.libro_isbn.extend([None] * faltan)
+            self.libro_anio.extend([NULO] * faltan)
+            self.libro_copias.extend([NULO] * faltan)
+
+    def _asegurar_autor(self, autor_id: int):
+        faltan = autor_id + 1 - len(self.autor_existe)
+        if faltan > 0:
+            self.autor_existe.extend(bytes(faltan))
+            self.autor_nombre.extend([None] * faltan)
+            self.autor_pais.extend([None] * faltan)
+            self.autor_anio.extend([NULO] * faltan)
+
+    # -- Escrituras --
+
+    def cargar(self, db: Session):
+        """
+        Carga el catálogo completo desde la base de datos usando consultas Core.
+        """
+        with self._lock_escritura:
+            self._cargar(db)
+
+    def _cargar(self, db: Session):
+        libros = db.execute(select(
+            modelos.Libro.id, modelos.Libro.titulo, modelos.Libro.ISBN,
+            modelos.Libro.anio_publicacion, modelos.Libro.copias_disponibles
+        )).all()
+        autores = db.execute(select(
+            modelos.Autor.id, modelos.Autor.nombre,
+            modelos.Autor.pais_origen, modelos.Autor.anio_nacimiento
+        )).all()
+        pares = db.execute(select(
+            modelos.libros_autores.c.libro_id, modelos.libros_autores.c.autor_id
+        )).all()
+
+        with self._lock:
+            self._vaciar()
+            for fila in libros:
+                self._poner_libro(*fila)
+            for fila in autores:
+                self._poner_autor(*fila)
+            self.autores_de_libro = _Adyacencia.desde_pares(
+                ((l, a) for l, a in pares), len(self.libro_existe)
+            )
+            self.libros_de_autor = _Adyacencia.desde_pares(
+                ((a, l) for l, a in pares), len(self.autor_existe)
+            )
+
+    def _poner_libro(self, libro_id, titulo, isbn, anio, copias):
+        self._asegurar_libro(libro_id)
+        if self.libro_existe[libro_id]:
+            self._quitar_de_anio(libro_id)
+            self.bytes_cadenas_libros -= _bytes_cadenas(self.libro_titulo[libro_id], self.libro_isbn[libro_id])
+        else:
+            self.n_libros += 1
+        self.bytes_cadenas_libros += _bytes_cadenas(titulo, isbn)
+        self.libro_existe[libro_id] = 1
+        self.libro_titulo[libro_id] = titulo
+        self.libro_isbn[libro_id] = isbn
+        self.libro_anio[libro_id] = _a_entero(anio)
+        self.libro_copias[libro_id] = _a_entero(copias)
+        insort(self.libros_por_anio.setdefault(anio, []), libro_id)
+
+    def _poner_autor(self, autor_id, nombre, pais, anio):
+        self._asegurar_autor(autor_id)
+        if self.autor_existe[autor_id]:
+            self.bytes_cadenas_autores -= _bytes_cadenas(self.autor_nombre[autor_id], self.autor_pais[autor_id])
+        else:
+            self.n_autores += 1
+        self.bytes_cadenas_autores += _bytes_cadenas(nombre, pais)
+        self.autor_existe[autor_id] = 1
+        self.autor_nombre[autor_id] = nombre
+        self.autor_pais[autor_id] = pais
+        self.autor_anio[autor_id] = _a_entero(anio)
+
+    def _quitar_de_anio(self, libro_id: int):
+        anio = _de_entero(self.libro_anio[libro_id])
+        ids = self.libros_por_anio.get(anio, [])
+        pos = bisect_left(ids, libro_id)
+        if pos < len(ids) and ids[pos] == libro_id:
+            del ids[pos]
+
+    def refrescar_libro(self, db: Session, libro_id: int):
+        """
+        Vuelve a leer de la base de datos un libro y sus autores (después del commit)
+        y lo copia al snapshot; si el libro ya no existe, lo quita.
+
+        Los escritores se ordenan con `_lock_escritura`: quien aplica último es quien
+        leyó último, así un refresco atrasado no deja un estado anterior. La consulta
+        se hace antes de tomar `_lock`, por lo que los lectores no esperan a la base.
+        """
+        with self._lock_escritura:
+            fila = db.execute(
+                select(
+                    modelos.Libro.id, modelos.Libro.titulo, modelos.Libro.ISBN,
+                    modelos.Libro.anio_publicacion, modelos.Libro.copias_disponibles
+                ).where(modelos.Libro.id == libro_id)
+            ).first()
+            autores = db.execute(
+                select(
+                    modelos.Autor.id, modelos.Autor.nombre,
+                    modelos.Autor.pais_origen, modelos.Autor.anio_nacimiento
+                )
+                .join(modelos.libros_autores, modelos.libros_autores.c.autor_id == modelos.Autor.id)
+                .where(modelos.libros_autores.c.libro_id == libro_id)
+            ).all()
+
+            with self._lock:
+                if fila is None:
+                    self._quitar_libro(libro_id)
+                    return
+                self._poner_libro(*fila)
+                for autor in autores:
+                    self._poner_autor(*autor)
+                nuevos = {a.id for a in autores}
+                anteriores = set(self.autores_de_libro.vecinos(libro_id))
+                for autor_id in anteriores - nuevos:
+                    self.libros_de_autor.quitar(autor_id, libro_id)
+                for autor_id in nuevos - anteriores:
+                    self.libros_de_autor.agregar(autor_id, libro_id)
+                if nuevos != anteriores:
+                    self.autores_de_libro.reemplazar(libro_id, nuevos)
+
+    def refrescar_autor(self, db: Session, autor_id: int):
+        """
+        Vuelve a leer de la base de datos un autor y sus libros (después del commit)
+        y lo copia al snapshot; si el autor ya no existe, lo quita.
+        """
+        with self._lock_escritura:
+            fila = db.execute(
+                select(
+                    modelos.Autor.id, modelos.Autor.nombre,
+                    modelos.Autor.pais_origen, modelos.Autor.anio_nacimiento
+                ).where(modelos.Autor.id == autor_id)
+            ).first()
+            libro_ids = db.execute(
+                select(modelos.libros_autores.c.libro_id)
+                .where(modelos.libros_autores.c.autor_id == autor_id)
+            ).scalars().all()
+
+            with self._lock:
+                if fila is None:
+                    self._quitar_autor(autor_id)
+                    return
+                self._poner_autor(*fila)
+                nuevos = set(libro_ids)
+                anteriores = set(self.libros_de_autor.vecinos(autor_id))
+                for libro_id in anteriores - nuevos:
+                    self.autores_de_libro.quitar(libro_id, autor_id)
+                for libro_id in nuevos - anteriores:
+                    self.autores_de_libro.agregar(libro_id, autor_id)
+                if nuevos != anteriores:
+                    self.libros_de_autor.reemplazar(autor_id, nuevos)
+
+    def _quitar_libro(self, libro_id: int):
+        if libro_id >= len(self.libro_existe) or not self.libro_existe[libro_id]:
+            return
+        self._quitar_de_anio(libro_id)
+        self.n_libros -= 1
+        self.bytes_cadenas_libros -= _bytes_cadenas(self.libro_titulo[libro_id], self.libro_isbn[libro_id])
+        self.libro_existe[libro_id] = 0
+        self.libro_titulo[libro_id] = None
+        self.libro_isbn[libro_id] = None
+        for autor_id in self.autores_de_libro.vecinos(libro_id):
+            self.libros_de_autor.quitar(autor_id, libro_id)
+        self.autores_de_libro.reemplazar(libro_id, [])
+
+    def _quitar_autor(self, autor_id: int):
+        if autor_id >= len(self.autor_existe) or not self.autor_existe[autor_id]:
+            return
+        self.n_autores -= 1
+        self.bytes_cadenas_autores -= _bytes_cadenas(self.autor_nombre[autor_id], self.autor_pais[autor_id])
+        self.autor_existe[autor_id] = 0
+        self.autor_nombre[autor_id] = None
+        self.autor_pais[autor_id] = None
+        for libro_id in self.libros_de_autor.vecinos(autor_id):
+            self.autores_de_libro.quitar(libro_id, autor_id)
+        self.libros_de_autor.reemplazar(autor_id, [])
+
+    # -- Lecturas --
+
+    def _libro(self, libro_id: int) -> schemas.Libro:
+        return schemas.Libro(
+            id=libro_id,
+            titulo=self.libro_titulo[libro_id],
+            ISBN=self.libro_isbn[libro_id],
+            anio_publicacion=_de_entero(self.libro_anio[libro_id]),
+            copias_disponibles=_de_entero(self.libro_copias[libro_id]),
+            autores=[self.autor_nombre[a] for a in self.autores_de_libro.vecinos(libro_id)]
+        )
+
+    def _autor(self, autor_id: int) -> schemas.Autor:
+        return schemas.Autor(
+            id=autor_id,
+            nombre=self.autor_nombre[autor_id],
+            pais_origen=self.autor_pais[autor_id],
+            anio_nacimiento=_de_entero(self.autor_anio[autor_id]),
+            libros=[self.libro_titulo[l] for l in self.libros_de_autor.vecinos(autor_id)]
+        )
+
+    def obtener_libro(self, libro_id: int) -> Optional[schemas.Libro]:
+        with self._lock:
+            if 0 <= libro_id < len(self.libro_existe) and self.libro_existe[libro_id]:
+                return self._libro(libro_id)
+            return None
+
+    def obtener_autor(self, autor_id: int) -> Optional[schemas.Autor]:
+        with self._lock:
+            if 0 <= autor_id < len(self.autor_existe) and self.autor_existe[autor_id]:
+                return self._autor(autor_id)
+            return None
+
+    def obtener_libros_por_anio(self, anio: int, skip: int = 0, limit: int = 100) -> List[schemas.Libro]:
+        with self._lock:
+            ids = self.libros_por_anio.get(anio, [])[skip:skip + limit]
+            return [self._libro(l) for l in ids]
+
+    def obtener_libros_de_autor(self, autor_id: int) -> List[schemas.Libro]:
+        with self._lock:
+            return [self._libro(l) for l in self.libros_de_autor.vecinos(autor_id)]
+
+    def obtener_autores_de_libro(self, libro_id: int) -> Optional[List[schemas.Autor]]:
+        with self._lock:
+            if not (0 <= libro_id < len(self.libro_existe) and self.libro_existe[libro_id]):
+                return None
+            return [self._autor(a) for a in self.autores_de_libro.vecinos(libro_id)]
+
+    # -- Memoria --
+
+    def reporte_memoria(self) -> dict:
+        """
+        Mide los bytes que ocupa el snapshot y estima cuánto ocuparía con un millón de libros.
+
+        La estimación usa el costo marginal de cada registro (un elemento de cada arreglo,
+        las cadenas promedio, los IDs de la adyacencia en ambos sentidos) y no incluye
+        el tamaño fijo de los contenedores, que no crece con el número de libros.
+        Las cadenas y los pares salen de contadores, así el reporte no recorre el
+        catálogo ni bloquea a los lectores mientras se calcula.
+        """
+        with self._lock:
+            n_libros, n_autores = self.n_libros, self.n_autores
+            cadenas_libros, cadenas_autores = self.bytes_cadenas_libros, self.bytes_cadenas_autores
+            n_pares = self.autores_de_libro.n_pares
+            bytes_libros = (
+                sys.getsizeof(self.libro_existe)
+                + sys.getsizeof(self.libro_titulo)
+                + sys.getsizeof(self.libro_isbn)
+                + cadenas_libros
+                + sys.getsizeof(self.libro_anio)
+                + sys.getsizeof(self.libro_copias)
+                + sum(sys.getsizeof(ids) for ids in self.libros_por_anio.values())
+            )
+            bytes_autores = (
+                sys.getsizeof(self.autor_existe)
+                + sys.getsizeof(self.autor_nombre)
+                + sys.getsizeof(self.autor_pais)
+                + cadenas_autores
+                + sys.getsizeof(self.autor_anio)
+            )
+            bytes_adyacencia = self.autores_de_libro.bytes() + self.libros_de_autor.bytes()
+            bytes_id = sys.getsizeof(len(self.libro_existe))
+
+        reporte = {
+            "libros": n_libros,
+            "autores": n_autores,
+            "bytes_libros": bytes_libros,
+            "bytes_autores": bytes_autores,
+            "bytes_adyacencia": bytes_adyacencia,
+            "bytes_total": bytes_libros + bytes_autores + bytes_adyacencia,
+            "bytes_por_libro": None,
+            "bytes_por_autor": None,
+            "mb_por_millon_de_libros": None,
+        }
+        if not n_libros:
+            return reporte
+
+        entero = array("q").itemsize
+        puntero = 8  # cada elemento de una lista es un puntero
+        bytes_por_libro = (
+            1                                           # libro_existe
+            + 2 * puntero                               # libro_titulo, libro_isbn
+            + cadenas_libros / n_libros
+            + 2 * entero                                # libro_anio, libro_copias
+            + puntero + bytes_id                        # ID en libros_por_anio
+            + entero                                    # offset CSR de autores_de_libro
+            + n_pares / n_libros * 2 * entero           # IDs de la adyacencia en ambos sentidos
+        )
+        bytes_por_autor = 0.0
+        if n_autores:
+            bytes_por_autor = (
+                1                                       # autor_existe
+                + 2 * puntero                           # autor_nombre, autor_pais
+                + cadenas_autores / n_autores
+                + entero                                # autor_anio
+                + entero                                # offset CSR de libros_de_autor
+            )
+        reporte["bytes_por_libro"] = round(bytes_por_libro, 1)
+        reporte["bytes_por_autor"] = round(bytes_por_autor, 1)
+        reporte["mb_por_millon_de_libros"] = round(
+            1_000_000 * (bytes_por_libro + n_autores / n_libros * bytes_por_autor) / 2 ** 20, 1
+        )
+        return reporte
+
+
+# Instancia global; solo existe si el modo snapshot está activo
+catalogo: Optional[Catalogo] = Catalogo() if ACTIVO else None
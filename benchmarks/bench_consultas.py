@@ -0,0 +1,106 @@
+"""
+Compara el CPU por petición de las lecturas con ORM (Query + objetos mapeados)
+contra la capa Core de `app.consultas` (lambda_stmt + filas), verificando que
+ambas devuelven exactamente los mismos resultados.
+
+Uso:
+    python -m benchmarks.bench_consultas [n_libros] [repeticiones]
+"""
+import sys
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, modelos
+from app.database import Base
+
+
+#           --Ruta ORM original (referencia)--
+
+def orm_obtener_libro(db, libro_id):
+    libro = db.query(modelos.Libro).filter(modelos.Libro.id == libro_id).first()
+    return crud._libro_to_schema(libro) if libro else None
+
+
+def orm_obtener_autor(db, autor_id):
+    autor = db.query(modelos.Autor).filter(modelos.Autor.id == autor_id).first()
+    return crud._autor_to_schema(autor) if autor else None
+
+
+def orm_obtener_libros(db, skip=0, limit=100):
+    libros = db.query(modelos.Libro).offset(skip).limit(limit).all()
+    return [crud._libro_to_schema(l) for l in libros]
+
+
+#           --Preparación de datos--
+
+def poblar(Sesion, n_libros: int):
+    with Sesion() as db:
+        autores = [
+            modelos.Autor(nombre=f"Autor {i}", pais_origen="Colombia", anio_nacimiento=1900 + i % 100)
+            for i in range(max(1, n_libros // 10))
+        ]
+        db.add_all(autores)
+        for i in range(n_libros):
+            db.add(modelos.Libro(
+                titulo=f"Libro {i}",
+                ISBN=f"isbn-{i}",
+                anio_publicacion=1950 + i % 70,
+                copias_disponibles=i % 5,
+                autores=list({autores[i % len(autores)], autores[(i * 7) % len(autores)]})
+            ))
+        db.commit()
+
+
+def medir(nombre: str, funcion, repeticiones: int) -> float:
+    inicio = time.process_time()
+    for i in range(repeticiones):
+        funcion(i)
+    cpu = (time.process_time() - inicio) / repeticiones * 1e6
+    print(f"  {nombre:<10} {cpu:9.1f} µs CPU/petición")
+    return cpu
+
+
+def main():
+    n_libros = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    Sesion = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    poblar(Sesion, n_libros)
+    n_autores = max(1, n_libros // 10)
+
+    casos = [
+        ("obtener_libro", lambda db, i: orm_obtener_libro(db, i % n_libros + 1),
+         lambda db, i: crud.obtener_libro(db, i % n_libros + 1)),
+        ("obtener_autor", lambda db, i: orm_obtener_autor(db, i % n_autores + 1),
+         lambda db, i: crud.obtener_autor(db, i % n_autores + 1)),
+        ("obtener_libros", lambda db, i: orm_obtener_libros(db, (i * 20) % n_libros, 20),
+         lambda db, i: crud.obtener_libros(db, (i * 20) % n_libros, 20)),
+    ]
+
+    for nombre, orm, core in casos:
+        # Cada petición usa su propia sesión, como con database.get_db
+        def por_peticion(funcion):
+            def _ejecutar(i):
+                with Sesion() as db:
+                    return funcion(db, i)
+            return _ejecutar
+
+        for i in range(50):
+            resultado_orm = por_peticion(orm)(i)
+            resultado_core = por_peticion(core)(i)
+            if not isinstance(resultado_orm, list):
+                resultado_orm, resultado_core = [resultado_orm], [resultado_core]
+            assert [r.dict() for r in resultado_orm] == [r.dict() for r in resultado_core], nombre
+
+        print(f"{nombre} ({n_libros} libros, {repeticiones} peticiones)")
+        cpu_orm = medir("ORM", por_peticion(orm), repeticiones)
+        cpu_core = medir("Core", por_peticion(core), repeticiones)
+        print(f"  reducción  {100 * (1 - cpu_core / cpu_orm):8.1f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Mide el throughput de escritura de `crud.crear_libro` con un número creciente de
+procesos (como varios workers de uvicorn) y verifica que el manejo de ISBN
+duplicados funcione en cada base de datos.
+
+ATENCIÓN: borra y vuelve a crear las tablas en cada URL indicada; usar solo
+bases de datos desechables.
+
+Uso:
+    python -m benchmarks.bench_escrituras [url ...]
+
+Sin argumentos usa un SQLite temporal. La palabra "pgserver" levanta un
+PostgreSQL local desechable (requiere `pip install pgserver "psycopg[binary]"`).
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, schemas
+from app.database import Base, crear_motor
+from benchmarks.verificar_backend import url_pgserver
+
+CONCURRENCIAS = (1, 2, 4, 8, 16)
+LIBROS_POR_NIVEL = 800
+
+# Sesión de cada proceso trabajador (se crea en _iniciar_proceso)
+_Sesion = None
+
+
+def _libro(isbn: str) -> schemas.LibroCreate:
+    return schemas.LibroCreate(titulo=f"Libro {isbn}", ISBN=isbn, anio_publicacion=2000, copias_disponibles=1)
+
+
+def verificar_isbn_duplicado(Sesion, hilos: int = 8):
+    """
+    Varios hilos crean a la vez un libro con el mismo ISBN: solo uno debe lograrlo
+    y el resto debe recibir el ValueError de `crear_libro`.
+    """
+    barrera = threading.Barrier(hilos)
+
+    def _intentar(_):
+        with Sesion() as db:
+            barrera.wait()
+            try:
+                crud.crear_libro(db, _libro("isbn-repetido"), [])
+                return "creado"
+            except ValueError:
+                return "duplicado"
+
+    with ThreadPoolExecutor(hilos) as ejecutor:
+        resultados = list(ejecutor.map(_intentar, range(hilos)))
+    assert resultados.count("creado") == 1, resultados
+    assert resultados.count("duplicado") == hilos - 1, resultados
+
+
+def _iniciar_proceso(url: str):
+    global _Sesion
+    motor = crear_motor(url, pool_clase="queue", pool_tamanio=1, pool_desborde=0)
+    _Sesion = sessionmaker(bind=motor, autoflush=False, autocommit=False)
+
+
+def _insertar(isbn: str) -> int:
+    with _Sesion() as db:
+        try:
+            crud.crear_libro(db, _libro(isbn), [])
+            return 0
+        except OperationalError:
+            # SQLite: "database is locked" cuando otro escritor retiene el archivo
+            db.rollback()
+            return 1
+
+
+def medir_escrituras(url: str, procesos: int, prefijo: str):
+    isbns = [f"{prefijo}-{i}" for i in range(LIBROS_POR_NIVEL)]
+    with ProcessPoolExecutor(procesos, initializer=_iniciar_proceso, initargs=(url,)) as ejecutor:
+        # Calentamiento: que todos los procesos estén conectados antes de medir
+        list(ejecutor.map(_insertar, [f"{prefijo}-calentamiento-{i}" for i in range(procesos)]))
+        inicio = time.perf_counter()
+        errores = sum(ejecutor.map(_insertar, isbns, chunksize=16))
+        segundos = time.perf_counter() - inicio
+    return (LIBROS_POR_NIVEL - errores) / segundos, errores
+
+
+def ejecutar(url: str):
+    motor = crear_motor(url, pool_clase="queue", pool_tamanio=8, pool_desborde=0, pool_pre_ping=True)
+    Base.metadata.drop_all(bind=motor)
+    Base.metadata.create_all(bind=motor)
+    Sesion = sessionmaker(bind=motor, autoflush=False, autocommit=False)
+
+    print(f"{motor.dialect.name} ({motor.url.render_as_string(hide_password=True)})")
+    verificar_isbn_duplicado(Sesion)
+    print("  ISBN duplicado concurrente: OK")
+    motor.dispose()
+
+    for procesos in CONCURRENCIAS:
+        por_segundo, errores = medir_escrituras(url, procesos, f"p{procesos}")
+        print(f"  {procesos:>3} procesos  {por_segundo:9.1f} libros/s  errores: {errores}")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as temporal:
+        urls = sys.argv[1:] or [f"sqlite:///{os.path.join(temporal, 'bench.db')}"]
+        for url in urls:
+            if url == "pgserver":
+                url = url_pgserver(os.path.join(temporal, "pgdata"))
+                if url is None:
+                    print("postgresql: omitido (pgserver no está instalado)")
+                    continue
+            ejecutar(url)
+
+
+if __name__ == "__main__":
+    main()
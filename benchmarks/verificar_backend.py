@@ -0,0 +1,156 @@
+"""
+Verifica que el esquema y las funciones de `crud` funcionen igual en cada base de
+datos: crear, leer, actualizar y eliminar libros y autores, incluidas las reglas
+de negocio y el ISBN duplicado en `crear_libro` y `actualizar_libro`.
+
+ATENCIÓN: borra y vuelve a crear las tablas en cada URL indicada; usar solo
+bases de datos desechables.
+
+Uso:
+    python -m benchmarks.verificar_backend [url ...]
+
+Sin argumentos verifica un SQLite temporal y un PostgreSQL local desechable
+levantado con pgserver (`pip install pgserver "psycopg[binary]"`); si pgserver
+no está instalado, PostgreSQL se omite.
+"""
+import os
+import sys
+import tempfile
+
+from sqlalchemy.orm import sessionmaker
+
+from app import consultas, crud, schemas
+from app.database import Base, crear_motor
+
+
+def url_pgserver(directorio: str):
+    """
+    Levanta un PostgreSQL local desechable y devuelve su URL, o None si pgserver no está instalado.
+    """
+    try:
+        import pgserver
+    except ImportError:
+        return None
+    servidor = pgserver.get_server(directorio, cleanup_mode="stop")
+    return servidor.get_uri().replace("postgresql://", "postgresql+psycopg://", 1)
+
+
+def _libro(titulo: str, isbn: str, anio: int = 2000, copias: int = 1) -> schemas.LibroCreate:
+    return schemas.LibroCreate(titulo=titulo, ISBN=isbn, anio_publicacion=anio, copias_disponibles=copias)
+
+
+def _actualizacion(libro: schemas.Libro, **cambios) -> schemas.LibroUpdate:
+    datos = {
+        "titulo": libro.titulo,
+        "ISBN": libro.ISBN,
+        "anio_publicacion": libro.anio_publicacion,
+        "copias_disponibles": libro.copias_disponibles,
+    }
+    datos.update(cambios)
+    return schemas.LibroUpdate(**datos)
+
+
+def _espera_error(funcion, mensaje: str):
+    try:
+        funcion()
+    except ValueError as e:
+        assert mensaje in str(e), f"se esperaba '{mensaje}', se obtuvo '{e}'"
+        return
+    raise AssertionError(f"se esperaba ValueError: {mensaje}")
+
+
+def verificar(Sesion):
+    """
+    Recorre el ciclo de vida completo de autores y libros. Cada paso usa su propia
+    sesión, como cada petición de la API con `database.get_db`.
+    """
+    def con_sesion(funcion, *args, **kwargs):
+        with Sesion() as db:
+            return funcion(db, *args, **kwargs)
+
+    # Autores
+    gabo = con_sesion(crud.crear_autor, schemas.AutorCreate(nombre="Gabo", pais_origen="Colombia", anio_nacimiento=1927))
+    borges = con_sesion(crud.crear_autor, schemas.AutorCreate(nombre="Borges", pais_origen="Argentina", anio_nacimiento=1899))
+    assert con_sesion(crud.obtener_autor, gabo.id).nombre == "Gabo"
+    assert [a.id for a in con_sesion(crud.obtener_autores, pais="Argentina")] == [borges.id]
+
+    # Crear libros
+    cien = con_sesion(crud.crear_libro, _libro("Cien años", "isbn-1", 1967, 0), [gabo.id, borges.id])
+    ficciones = con_sesion(crud.crear_libro, _libro("Ficciones", "isbn-2", 1944, 3), [borges.id])
+    assert sorted(cien.autores) == ["Borges", "Gabo"]
+    _espera_error(lambda: con_sesion(crud.crear_libro, _libro("Otro", "isbn-1"), []), "ISBN ya está registrado")
+    _espera_error(lambda: con_sesion(crud.crear_libro, _libro("Otro", "isbn-3"), [999]), "No se encontraron autores")
+
+    # Leer libros
+    assert con_sesion(crud.obtener_libro, cien.id) == cien
+    assert con_sesion(crud.obtener_libro_por_isbn, "isbn-2") == ficciones
+    assert [l.id for l in con_sesion(crud.obtener_libros, 0, 1)] == [cien.id]
+    assert [l.id for l in con_sesion(crud.obtener_libros, 1, 1)] == [ficciones.id]
+    assert [l.id for l in con_sesion(crud.obtener_libros_por_anio, 1944)] == [ficciones.id]
+    # Los autores y libros relacionados salen ordenados por ID, igual que en el snapshot y el mmap
+    assert [f.id for f in con_sesion(consultas.libros_de_autor, borges.id)] == [cien.id, ficciones.id]
+    assert [f.id for f in con_sesion(consultas.autores_de_libro, cien.id)] == [gabo.id, borges.id]
+    assert con_sesion(crud.obtener_libro, cien.id).autores == ["Gabo", "Borges"]
+    assert con_sesion(crud.obtener_autor, borges.id).libros == ["Cien años", "Ficciones"]
+
+    # Actualizar libros
+    cien = con_sesion(crud.actualizar_libro, cien.id, _actualizacion(cien, titulo="Cien años de soledad", autor_ids=[gabo.id]))
+    assert cien.titulo == "Cien años de soledad" and cien.autores == ["Gabo"]
+    _espera_error(
+        lambda: con_sesion(crud.actualizar_libro, cien.id, _actualizacion(cien, ISBN="isbn-2")),
+        "ISBN ya está registrado"
+    )
+    _espera_error(
+        lambda: con_sesion(crud.actualizar_libro, cien.id, schemas.LibroUpdate(copias_disponibles=3)),
+        "Faltan datos obligatorios"
+    )
+    _espera_error(
+        lambda: con_sesion(crud.actualizar_libro, cien.id, _actualizacion(cien, copias_disponibles=-1)),
+        "no pueden ser negativas"
+    )
+    assert con_sesion(crud.obtener_libro, cien.id) == cien
+    assert con_sesion(crud.actualizar_libro, 999, _actualizacion(cien)) is None
+
+    # Actualizar autores
+    con_sesion(crud.actualizar_autor, borges.id, schemas.AutorCreate(nombre="J. L. Borges", pais_origen="Argentina", anio_nacimiento=1899))
+    assert con_sesion(crud.obtener_libro, ficciones.id).autores == ["J. L. Borges"]
+
+    # Eliminar libros
+    _espera_error(lambda: con_sesion(crud.eliminar_libro, ficciones.id), "aún tiene copias disponibles")
+    assert con_sesion(crud.eliminar_libro, cien.id).id == cien.id
+    assert con_sesion(crud.obtener_libro, cien.id) is None
+    assert con_sesion(crud.obtener_autor, gabo.id).libros == []
+    assert con_sesion(crud.eliminar_libro, cien.id) is None
+
+    # Eliminar autores: la relación con sus libros también se borra
+    assert con_sesion(crud.eliminar_autor, borges.id).id == borges.id
+    assert con_sesion(crud.obtener_autor, borges.id) is None
+    assert con_sesion(crud.obtener_libro, ficciones.id).autores == []
+    assert con_sesion(crud.eliminar_autor, borges.id) is None
+
+
+def ejecutar(url: str):
+    motor = crear_motor(url)
+    Base.metadata.drop_all(bind=motor)
+    Base.metadata.create_all(bind=motor)
+    try:
+        verificar(sessionmaker(bind=motor, autoflush=False, autocommit=False))
+    finally:
+        motor.dispose()
+    print(f"{motor.dialect.name}: OK")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as temporal:
+        urls = sys.argv[1:] or [f"sqlite:///{os.path.join(temporal, 'verificar.db')}", "pgserver"]
+        for url in urls:
+            if url == "pgserver":
+                url = url_pgserver(os.path.join(temporal, "pgdata"))
+                if url is None:
+                    print("postgresql: omitido (pgserver no está instalado)")
+                    continue
+            ejecutar(url)
+
+
+if __name__ == "__main__":
+    main()